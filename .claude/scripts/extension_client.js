@@ -16,24 +16,45 @@ const DAILY_LIMITS = {
   profiles_scraped: 100
 };
 const MONTHLY_INMAIL_LIMIT = 50;
+const LIMIT_KEYS = { sendConnection: 'connections_sent', sendInMail: 'inmails_sent', sendMessage: 'messages_sent', searchProfiles: 'profiles_scraped', deepScan: 'profiles_scraped' };
+
+const JSON_HEADERS = { 'Content-Type': 'application/json' };
+const NO_COMMAND = JSON.stringify({ command: null }); // idle /poll reply, sent ~2x per second
+const CORS_HEADERS = {
+  'Access-Control-Allow-Origin': '*',
+  'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+  'Access-Control-Allow-Headers': 'Content-Type'
+};
 
 // ── Rate Limits ──────────────────────────────────────────────
+// Parsed limits keyed on file mtime/size: re-parse only when another process wrote it
+let limitsCache = null;
+
+function loadLimitsFile() {
+  const st = fs.statSync(LIMITS_FILE);
+  if (!limitsCache || limitsCache.mtimeMs !== st.mtimeMs || limitsCache.size !== st.size) {
+    limitsCache = { mtimeMs: st.mtimeMs, size: st.size, data: JSON.parse(fs.readFileSync(LIMITS_FILE, 'utf8')) };
+  }
+  return { ...limitsCache.data }; // callers mutate the result
+}
+
 function readLimits() {
+  const now = new Date(); // one clock sample for the date check, rollover and default
+  const today = now.toISOString().split('T')[0];
   try {
-    const data = JSON.parse(fs.readFileSync(LIMITS_FILE, 'utf8'));
-    const today = new Date().toISOString().split('T')[0];
+    const data = loadLimitsFile();
     if (data.date !== today) {
       data.date = today;
       data.connections_sent = 0;
       data.inmails_sent = 0;
       data.messages_sent = 0;
       data.profiles_scraped = 0;
-      if (new Date().getDate() === 1) data.monthly_inmails = 0;
+      if (now.getDate() === 1) data.monthly_inmails = 0;
     }
     return data;
   } catch {
     return {
-      date: new Date().toISOString().split('T')[0],
+      date: today,
       connections_sent: 0, inmails_sent: 0,
       messages_sent: 0, profiles_scraped: 0, monthly_inmails: 0
     };
@@ -41,14 +62,18 @@ function readLimits() {
 }
 
 function writeLimits(limits) {
-  if (!fs.existsSync(OUTPUT_DIR)) fs.mkdirSync(OUTPUT_DIR, { recursive: true });
-  fs.writeFileSync(LIMITS_FILE, JSON.stringify(limits, null, 2));
+  // Every write: long-lived sessions must survive output/ being removed mid-run
+  fs.mkdirSync(OUTPUT_DIR, { recursive: true }); // no-op when it exists, no separate existsSync
+  fs.writeFileSync(LIMITS_FILE, JSON.stringify(limits)); // compact: machine-read, getLimits pretty-prints
+  // Cache what we just wrote: a same-size rewrite within coarse mtime granularity
+  // would otherwise leave the previous parse looking current
+  const st = fs.statSync(LIMITS_FILE);
+  limitsCache = { mtimeMs: st.mtimeMs, size: st.size, data: { ...limits } };
 }
 
 function incrementLimit(action) {
   const limits = readLimits();
-  const map = { sendConnection: 'connections_sent', sendInMail: 'inmails_sent', sendMessage: 'messages_sent', searchProfiles: 'profiles_scraped', deepScan: 'profiles_scraped' };
-  const key = map[action];
+  const key = LIMIT_KEYS[action];
   if (key) { limits[key]++; if (action === 'sendInMail') limits.monthly_inmails++; }
   writeLimits(limits);
   return limits;
@@ -56,16 +81,32 @@ function incrementLimit(action) {
 
 function checkLimit(action) {
   const limits = readLimits();
-  const map = { sendConnection: 'connections_sent', sendInMail: 'inmails_sent', sendMessage: 'messages_sent', searchProfiles: 'profiles_scraped', deepScan: 'profiles_scraped' };
-  const key = map[action];
+  const key = LIMIT_KEYS[action];
   if (key && limits[key] >= DAILY_LIMITS[key]) return { allowed: false, reason: `Daily limit reached: ${limits[key]}/${DAILY_LIMITS[key]} ${key}` };
   if (action === 'sendInMail' && limits.monthly_inmails >= MONTHLY_INMAIL_LIMIT) return { allowed: false, reason: `Monthly InMail limit: ${limits.monthly_inmails}/${MONTHLY_INMAIL_LIMIT}` };
   return { allowed: true };
 }
 
+// ── Argument Checks ──────────────────────────────────────────
+// Catch bad args locally instead of after a tab navigation (or a 120s timeout)
+const PROFILE_URL_RE = /^https:\/\/([a-z]+\.)?linkedin\.com\/in\/[^/?#\s]+\/?$/;
+const REQUIRED_TEXT = { sendMessage: 'message', sendInMail: 'body' };
+
+function validateArgs(command, args) {
+  if (args.profileUrl !== undefined && !PROFILE_URL_RE.test(args.profileUrl)) {
+    return { success: false, error: 'INVALID_ARGS', message: 'profileUrl must look like https://www.linkedin.com/in/<slug>: ' + args.profileUrl };
+  }
+  const field = REQUIRED_TEXT[command];
+  if (field && !(typeof args[field] === 'string' && args[field].trim())) {
+    return { success: false, error: 'INVALID_ARGS', message: `${command} requires a non-empty "${field}"` };
+  }
+  return null;
+}
+
 // ── Server State ─────────────────────────────────────────────
 let pendingCommand = null;
 let pendingResolve = null;
+let pendingId = null;
 let commandId = 0;
 let extensionConnected = false;
 let extensionReadyResolve = null; // resolves when extension first polls
@@ -73,9 +114,7 @@ let extensionReadyResolve = null; // resolves when extension first polls
 function startServer() {
   return new Promise((resolveStart, rejectStart) => {
     const server = http.createServer((req, res) => {
-      res.setHeader('Access-Control-Allow-Origin', '*');
-      res.setHeader('Access-Control-Allow-Methods', 'GET, POST, OPTIONS');
-      res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+      for (const h in CORS_HEADERS) res.setHeader(h, CORS_HEADERS[h]);
       if (req.method === 'OPTIONS') { res.writeHead(204); res.end(); return; }
 
       // Extension polls this endpoint
@@ -85,14 +124,11 @@ function startServer() {
           extensionConnected = true;
           if (extensionReadyResolve) { extensionReadyResolve(); extensionReadyResolve = null; }
         }
-        res.writeHead(200, { 'Content-Type': 'application/json' });
-        if (pendingCommand) {
-          const cmd = pendingCommand;
-          pendingCommand = null;
-          res.end(JSON.stringify(cmd));
-        } else {
-          res.end(JSON.stringify({ command: null }));
-        }
+        res.writeHead(200, JSON_HEADERS);
+        if (!pendingCommand) { res.end(NO_COMMAND); return; }
+        const cmd = pendingCommand;
+        pendingCommand = null;
+        res.end(JSON.stringify(cmd));
         return;
       }
 
@@ -103,9 +139,10 @@ function startServer() {
         req.on('end', () => {
           try {
             const data = JSON.parse(body);
-            if (pendingResolve) { pendingResolve(data.result); pendingResolve = null; }
+            // Ignore late/duplicate posts for a command that already resolved
+            if (pendingResolve && data.id === pendingId) { pendingResolve(data.result); pendingResolve = null; }
           } catch {}
-          res.writeHead(200, { 'Content-Type': 'application/json' });
+          res.writeHead(200, JSON_HEADERS);
           res.end(JSON.stringify({ ok: true }));
         });
         return;
@@ -119,11 +156,11 @@ function startServer() {
           try {
             const data = JSON.parse(body);
             sendCommand(data.command, data.args || {}).then(result => {
-              res.writeHead(200, { 'Content-Type': 'application/json' });
+              res.writeHead(200, JSON_HEADERS);
               res.end(JSON.stringify(result));
             });
           } catch (e) {
-            res.writeHead(400, { 'Content-Type': 'application/json' });
+            res.writeHead(400, JSON_HEADERS);
             res.end(JSON.stringify({ error: e.message }));
           }
         });
@@ -131,7 +168,7 @@ function startServer() {
       }
 
       if (req.method === 'GET' && req.url === '/status') {
-        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.writeHead(200, JSON_HEADERS);
         res.end(JSON.stringify({ server: 'running', extensionConnected, limits: readLimits() }));
         return;
       }
@@ -169,28 +206,61 @@ function waitForExtension(timeoutMs = 30000) {
   });
 }
 
+// Read-only commands: identical concurrent calls share one round-trip to the extension
+const READ_ONLY_COMMANDS = new Set(['ping', 'checkLoginStatus', 'deepScan', 'checkAcceptance', 'checkConnectionStatus']);
+const inflight = new Map();
+
 function sendCommand(command, args) {
+  if (!READ_ONLY_COMMANDS.has(command)) return dispatchCommand(command, args);
+  const key = command + ' ' + JSON.stringify(args);
+  let p = inflight.get(key);
+  if (!p) {
+    p = dispatchCommand(command, args).finally(() => inflight.delete(key));
+    inflight.set(key, p);
+  }
+  return p;
+}
+
+// The server has a single pending slot, so dispatches run one at a time: a command
+// never takes over another's slot, and each one settles (result or timeout).
+let dispatchQueue = Promise.resolve();
+
+function dispatchCommand(command, args) {
+  const run = dispatchQueue.then(() => dispatchNow(command, args));
+  dispatchQueue = run.catch(() => {});
+  return run;
+}
+
+function dispatchNow(command, args) {
   return new Promise((resolve) => {
     const id = ++commandId;
+    const invalid = validateArgs(command, args);
+    if (invalid) { resolve(invalid); return; }
     const limitCheck = checkLimit(command);
     if (!limitCheck.allowed) {
       resolve({ success: false, error: 'RATE_LIMITED', message: limitCheck.reason });
       return;
     }
     pendingCommand = { id, command, args };
-    pendingResolve = (result) => {
-      if (result && result.success) incrementLimit(command);
-      resolve(result);
-    };
+    pendingId = id;
     // Long timeout for commands like searchProfiles that navigate multiple pages
     const timeout = command === 'searchProfiles' ? 300000 : 120000;
-    setTimeout(() => {
-      if (pendingResolve) {
+    // Always settle this command on timeout, but only clear the shared slot while
+    // it still belongs to it: in a session (openSession) later commands reuse it.
+    const timer = setTimeout(() => {
+      if (pendingId === id) {
         pendingResolve = null;
         pendingCommand = null;
-        resolve({ success: false, error: 'TIMEOUT', message: `Extension did not respond within ${timeout / 1000}s` });
+        pendingId = null;
       }
+      resolve({ success: false, error: 'TIMEOUT', message: `Extension did not respond within ${timeout / 1000}s` });
     }, timeout);
+    pendingResolve = (result) => {
+      clearTimeout(timer);
+      pendingId = null;
+      resolve(result); // before counting: a failed limits write must not strand the caller
+      if (result && result.success) incrementLimit(command);
+    };
   });
 }
 
@@ -210,6 +280,44 @@ function sendCommandViaHTTP(command, args) {
   });
 }
 
+// ── Session ──────────────────────────────────────────────────
+// Ping the content script; returns an error result, or null if ready + logged in.
+async function verifyContentScript() {
+  const pingResult = await sendCommand('ping', {});
+  if (!pingResult || !pingResult.success) {
+    console.error('[10X] Content script not ready: ' + JSON.stringify(pingResult));
+    return { success: false, error: 'CONTENT_SCRIPT_NOT_READY', message: 'Extension connected but content script failed. Refresh LinkedIn tab (F5) and try again.' };
+  }
+  console.error('[10X] Content script verified. LinkedIn logged in: ' + (pingResult.loggedIn ? 'Yes' : 'No'));
+  if (!pingResult.loggedIn) return { success: false, error: 'NOT_LOGGED_IN', message: 'Please log in to LinkedIn in Chrome and try again.' };
+  return null;
+}
+
+// Start (or reuse) the server once and hand back a send() for many commands.
+// Lets scripts like batch_connect.js run a whole batch over one handshake.
+async function openSession() {
+  let server;
+  try {
+    server = await startServer();
+  } catch (e) {
+    if (e.code !== 'EADDRINUSE') return { ok: false, result: { success: false, error: 'SERVER_FAILED', message: e.message } };
+    console.error('[10X] Server already running on port ' + PORT + ', sending commands via HTTP...');
+    return { ok: true, send: sendCommandViaHTTP, close() {} };
+  }
+  const close = () => server.close();
+
+  console.error('[10X] Waiting for Chrome extension to connect...');
+  try {
+    await waitForExtension(30000);
+  } catch (e) {
+    close();
+    return { ok: false, result: { success: false, error: 'EXTENSION_NOT_CONNECTED', message: e.message } };
+  }
+  const failure = await verifyContentScript();
+  if (failure) { close(); return { ok: false, result: failure }; }
+  return { ok: true, send: sendCommand, close };
+}
+
 // ── Main ─────────────────────────────────────────────────────
 async function main() {
   const args = process.argv.slice(2);
@@ -296,16 +404,9 @@ async function main() {
 
   // First send a ping to verify content script is alive
   if (command !== 'ping') {
-    const pingResult = await sendCommand('ping', {});
-    if (!pingResult || !pingResult.success) {
-      console.error('[10X] Content script not ready: ' + JSON.stringify(pingResult));
-      console.log(JSON.stringify({ success: false, error: 'CONTENT_SCRIPT_NOT_READY', message: 'Extension connected but content script failed. Refresh LinkedIn tab (F5) and try again.' }));
-      server.close(); process.exit(1);
-      return;
-    }
-    console.error('[10X] Content script verified. LinkedIn logged in: ' + (pingResult.loggedIn ? 'Yes' : 'No'));
-    if (!pingResult.loggedIn) {
-      console.log(JSON.stringify({ success: false, error: 'NOT_LOGGED_IN', message: 'Please log in to LinkedIn in Chrome and try again.' }));
+    const failure = await verifyContentScript();
+    if (failure) {
+      console.log(JSON.stringify(failure));
       server.close(); process.exit(1);
       return;
     }
@@ -318,4 +419,6 @@ async function main() {
   process.exit(result && result.success ? 0 : 1);
 }
 
-main().catch(e => { console.error(e); process.exit(1); });
+module.exports = { openSession };
+
+if (require.main === module) main().catch(e => { console.error(e); process.exit(1); });
@@ -1,4 +1,4 @@
-const SERVER_URL = 'http://localhost:3456';
+const SERVER_URL = 'http://127.0.0.1:3456'; // literal IP: no name resolution or ::1 fallback per poll
 const POLL_INTERVAL = 500;
 let connected = false;
 
@@ -32,8 +32,8 @@ async function injectAndVerify(tabId, retries = 3) {
   return { ok: false, error: 'Content script injection failed after ' + retries + ' attempts. Refresh the LinkedIn tab (F5).' };
 }
 
-// ── Find a LinkedIn tab, inject content script, return ready tab ──
-async function getReadyTab() {
+// ── Find a LinkedIn tab and wait for it to load (injection is up to the caller) ──
+async function findLinkedInTab() {
   const tabs = await chrome.tabs.query({ url: '*://*.linkedin.com/*' });
   if (!tabs.length) return { ok: false, error: 'No LinkedIn tab open. Please open linkedin.com in Chrome and log in.' };
 
@@ -54,7 +54,7 @@ async function getReadyTab() {
     });
   }
 
-  return await injectAndVerify(tab.id);
+  return { ok: true, tabId: tab.id };
 }
 
 // ── Navigate tab to URL and re-inject content script ──
@@ -80,16 +80,17 @@ async function navigateAndInject(tabId, url) {
 // ── Execute a command from the server ──
 async function executeCommand(data) {
   try {
-    const ready = await getReadyTab();
-    if (!ready.ok) {
-      await postResult(data.id, { success: false, error: ready.error });
+    const found = await findLinkedInTab();
+    if (!found.ok) {
+      await postResult(data.id, { success: false, error: found.error });
       setBadge('connected');
       return;
     }
-    const tabId = ready.tabId;
+    const tabId = found.tabId;
 
     // For commands that need multi-page navigation (searchProfiles),
     // handle navigation from background script instead of content script
+    // (it injects after every page load, so no injection up front)
     if (data.command === 'searchProfiles') {
       const result = await handleSearchProfiles(tabId, data.args || {});
       await postResult(data.id, result);
@@ -100,21 +101,23 @@ async function executeCommand(data) {
 
     // For commands that navigate to a profile URL, do navigation from here
     const args = data.args || {};
+    let navigateTo = null;
     if (args.profileUrl) {
       const currentUrl = (await chrome.tabs.get(tabId)).url || '';
       const targetPath = args.profileUrl.replace('https://www.linkedin.com', '');
-      if (!currentUrl.includes(targetPath)) {
-        const nav = await navigateAndInject(tabId, args.profileUrl);
-        if (!nav.ok) {
-          await postResult(data.id, { success: false, error: nav.error });
-          setBadge('connected');
-          return;
-        }
-      }
-      // Tell content script NOT to navigate (we already did it)
+      if (!currentUrl.includes(targetPath)) navigateTo = args.profileUrl;
+      // Tell content script NOT to navigate (we do it here)
       args._skipNavigation = true;
     }
 
+    // Inject + verify once: after the navigation if there is one, else on the current page
+    const ready = navigateTo ? await navigateAndInject(tabId, navigateTo) : await injectAndVerify(tabId);
+    if (!ready.ok) {
+      await postResult(data.id, { success: false, error: ready.error });
+      setBadge('connected');
+      return;
+    }
+
     // Send command to content script
     let result = null;
     try {
@@ -190,15 +193,25 @@ async function handleSearchProfiles(tabId, args) {
 }
 
 // ── Post result back to Node.js server ──
-async function postResult(id, result) {
-  try {
-    await fetch(SERVER_URL + '/result', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ id, result }),
-      signal: AbortSignal.timeout(5000)
-    });
-  } catch (e) { console.error('[10X] Post failed:', e); }
+// Retries with exponential backoff + jitter: a dropped result means the action
+// already happened on LinkedIn but the client times out and never counts it.
+async function postResult(id, result, retries = 4) {
+  const body = JSON.stringify({ id, result });
+  for (let i = 0; i < retries; i++) {
+    try {
+      const res = await fetch(SERVER_URL + '/result', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body,
+        signal: AbortSignal.timeout(5000)
+      });
+      if (res.ok) return;
+      throw new Error('HTTP ' + res.status);
+    } catch (e) {
+      if (i === retries - 1) { console.error('[10X] Post failed:', e); return; }
+      await new Promise(r => setTimeout(r, Math.min(500 * 2 ** i, 4000) + Math.random() * 250));
+    }
+  }
 }
 
 // ── Daily counts tracking ──
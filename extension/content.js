@@ -167,6 +167,14 @@ async function debugProfileButtons() {
   };
 }
 
+// ── Search card parsing patterns (built once, used per link/line) ──
+// Card lines starting with a button label (matched against the lowercased line)
+const SKIP_LINE_RE = /^(connect|message|follow|pending|send|inmailmessage|view profile)/;
+const DEGREE_SUFFIX_RE = /\s*[•·]\s*(1st|2nd|3rd|[\d]+\+?).*/g;
+const DEGREE_LINE_RE = /^(1st|2nd|3rd|•|·)/;
+const LOCATION_RE = /\b(area|india|states|united|york|francisco|london|bangalore|mumbai|delhi|remote|california|texas|chicago|boston|seattle|singapore|dubai|canada|australia|germany|france|uk|england)\b/i;
+const CITY_REGION_RE = /^[A-Z][a-z]+,\s[A-Z]/;
+
 // Scrape search results on the CURRENT page (no navigation — background handles that)
 // LinkedIn 2025+: No semantic classes, no <li> cards. All obfuscated divs.
 // Strategy: find all a[href*="/in/"] links, group by URL, extract from ancestors.
@@ -180,35 +188,28 @@ async function scrapeCurrentPage() {
   // LinkedIn search results 2025: each result card is an <a> tag wrapping a div structure.
   // There are 2 links per profile: a big wrapper <a> (with full card text) and a smaller
   // name-only <a> inside it. We want the wrapper <a> to get the full card text.
+  // Single pass over the links: per URL keep the card wrapper and the name link
   const urlToCard = new Map();
   for (const a of allLinks) {
     const url = a.href.split('?')[0];
     if (!url.includes('/in/')) continue;
-    // Get the outermost <a> for this profile (the card wrapper)
-    // It's the one whose textContent is longest (contains name + headline + location)
-    const existing = urlToCard.get(url);
-    if (!existing || a.textContent.length > existing.textContent.length) {
-      urlToCard.set(url, a);
-    }
+    const text = a.textContent;
+    let entry = urlToCard.get(url);
+    // Card wrapper = the outermost <a>, i.e. longest textContent (name + headline + location)
+    if (!entry) { entry = { card: a, cardLength: text.length, name: '' }; urlToCard.set(url, entry); }
+    else if (text.length > entry.cardLength) { entry.card = a; entry.cardLength = text.length; }
+    // Name = the short name-only link (smallest non-trivial text for this URL)
+    const t = text.trim();
+    if (t.length > 1 && t.length < 60 && (!entry.name || t.length < entry.name.length)) entry.name = t;
   }
 
   const profiles = [];
-  for (const [profileUrl, cardLink] of urlToCard) {
+  for (const [profileUrl, { card: cardLink, name: linkName }] of urlToCard) {
     try {
       const fullText = cardLink.textContent.trim();
       if (!fullText || fullText.length < 3) continue;
 
-      // Also find the short name-only link (smallest text for this URL)
-      let name = '';
-      for (const a of allLinks) {
-        if (a.href.split('?')[0] === profileUrl) {
-          const t = a.textContent.trim();
-          if (t && t.length > 1 && t.length < 60) {
-            if (!name || t.length < name.length) name = t;
-          }
-        }
-      }
-      name = name.replace(/\s*[•·]\s*(1st|2nd|3rd|[\d]+\+?).*/g, '').trim();
+      const name = linkName.replace(DEGREE_SUFFIX_RE, '').trim();
       if (!name || name === 'LinkedIn Member') continue;
 
       // Parse the full card text to extract headline and location
@@ -221,17 +222,17 @@ async function scrapeCurrentPage() {
       // Find headline: first substantial line that isn't the name and isn't a button label
       let headline = '';
       let location = '';
-      const skipWords = ['connect', 'message', 'follow', 'pending', 'send', 'inmailmessage', 'view profile'];
+      const nameLower = name.toLowerCase();
       for (const line of lines) {
         const lower = line.toLowerCase();
         // Skip the name line, degree markers, button labels
-        if (line === name || lower.includes(name.toLowerCase())) continue;
-        if (/^(1st|2nd|3rd|•|·)/.test(line)) continue;
-        if (skipWords.some(w => lower.startsWith(w))) continue;
+        if (line === name || lower.includes(nameLower)) continue;
+        if (DEGREE_LINE_RE.test(line)) continue;
+        if (SKIP_LINE_RE.test(lower)) continue;
         if (line.length < 3) continue;
 
         // Location heuristic
-        const isLocation = /\b(area|india|states|united|york|francisco|london|bangalore|mumbai|delhi|remote|california|texas|chicago|boston|seattle|singapore|dubai|canada|australia|germany|france|uk|england)\b/i.test(line) || /^[A-Z][a-z]+,\s[A-Z]/.test(line);
+        const isLocation = LOCATION_RE.test(line) || CITY_REGION_RE.test(line);
         if (isLocation && !location) { location = line.substring(0, 100); continue; }
 
         // Headline: first non-name, non-location text that's substantial
@@ -276,11 +277,12 @@ function getProfileFirstName() {
 // This prevents matching sidebar buttons for other people
 function findProfileButton(selectors, firstName) {
   if (!firstName) return $q(selectors); // fallback to any match
+  const needle = firstName.toLowerCase();
   for (const sel of (Array.isArray(selectors) ? selectors : [selectors])) {
     const all = document.querySelectorAll(sel);
     for (const btn of all) {
       const label = (btn.getAttribute('aria-label') || '') + ' ' + btn.textContent;
-      if (label.toLowerCase().includes(firstName.toLowerCase())) return btn;
+      if (label.toLowerCase().includes(needle)) return btn;
     }
   }
   return null;
@@ -310,9 +312,10 @@ async function sendConnectionRequest(args) {
   }
   if (!btn) {
     // Check if Follow button exists — means not connected but no Connect option
+    const needle = firstName.toLowerCase();
     const followBtn = [...document.querySelectorAll('button')].find(b => {
-      const label = (b.getAttribute('aria-label') || '') + ' ' + b.textContent.trim();
-      return label.toLowerCase().includes('follow') && label.toLowerCase().includes(firstName.toLowerCase());
+      const label = ((b.getAttribute('aria-label') || '') + ' ' + b.textContent.trim()).toLowerCase();
+      return label.includes('follow') && label.includes(needle);
     });
     if (followBtn) return { success: false, error: 'FOLLOW_ONLY', message: 'Only Follow button found for ' + firstName + '. Use InMail instead.' };
     return { success: false, error: 'NO_CONNECT_BUTTON', message: 'Connect button not found for ' + firstName };
@@ -359,23 +362,25 @@ async function sendMessage(args) {
 }
 
 // ── Message Listener ──
+// Command table built once per injection, not per message
+const HANDLERS = {
+  ping, checkLoginStatus,
+  scrapeCurrentPage,
+  searchProfiles,
+  debugPage,
+  debugProfileButtons,
+  deepScan: deepScanProfile,
+  sendConnection: sendConnectionRequest,
+  sendInMail,
+  checkConnectionStatus,
+  checkAcceptance: checkConnectionStatus,
+  sendMessage,
+  detectWeeklyLimit: async () => ({ success: true, limitReached: !!$q(S.weeklyLimitModal) })
+};
+
 window.__10X_LISTENER = function(msg, sender, sendResponse) {
   if (msg.type !== '10X_COMMAND') return;
-  const handlers = {
-    ping, checkLoginStatus,
-    scrapeCurrentPage,
-    searchProfiles,
-    debugPage,
-    debugProfileButtons,
-    deepScan: deepScanProfile,
-    sendConnection: sendConnectionRequest,
-    sendInMail,
-    checkConnectionStatus,
-    checkAcceptance: checkConnectionStatus,
-    sendMessage,
-    detectWeeklyLimit: async () => ({ success: true, limitReached: !!$q(S.weeklyLimitModal) })
-  };
-  const fn = handlers[msg.command];
+  const fn = Object.hasOwn(HANDLERS, msg.command) ? HANDLERS[msg.command] : null;
   if (!fn) { sendResponse({ success: false, error: 'Unknown command: ' + msg.command }); return; }
   fn(msg.args).then(sendResponse).catch(e => sendResponse({ success: false, error: e.message }));
   return true;